@@ -4,6 +4,7 @@ using evidence from the cited abstracts. Formatted as a paragraph-level entailme
 
 import datasets
 import json
+import numpy as np
 
 
 _CITATION = """\
@@ -28,6 +29,28 @@ def flatten(xss):
     return [x for xs in xss for x in xs]
 
 
+def precompute_abstract(doc):
+    """Join an abstract's sentences once and record per-sentence character offsets.
+
+    Returns the joined text, int32 start/end offset arrays (end exclusive) and
+    int32 whitespace token counts, one entry per sentence.
+    """
+    sents = [sent.strip() for sent in doc["abstract"]]
+    lengths = np.array([len(sent) for sent in sents], dtype=np.int32)
+    # Sentences are joined with a single space.
+    starts = np.zeros(len(sents), dtype=np.int32)
+    if len(sents) > 1:
+        starts[1:] = np.cumsum(lengths[:-1] + 1, dtype=np.int32)
+    ends = starts + lengths
+    token_counts = np.array([len(sent.split()) for sent in sents], dtype=np.int32)
+    return {
+        "abstract_text": " ".join(sents),
+        "sentence_starts": starts,
+        "sentence_ends": ends,
+        "sentence_token_counts": token_counts,
+    }
+
+
 class HealthVerEntailmentConfig(datasets.BuilderConfig):
     """builderconfig for healthver"""
 
@@ -48,6 +71,18 @@ class HealthVerEntailment(datasets.GeneratorBasedBuilder):
     # TODO(healthver): Set up version.
     VERSION = datasets.Version("0.1.0")
 
+    BUILDER_CONFIGS = [
+        HealthVerEntailmentConfig(
+            name="abstracts",
+            description="Abstracts as lists of sentences with evidence sentence indices.",
+        ),
+        HealthVerEntailmentConfig(
+            name="rationale_spans",
+            description="Abstracts as joined text with precomputed sentence offsets, token counts and rationale character spans.",
+        ),
+    ]
+    DEFAULT_CONFIG_NAME = "abstracts"
+
     def _info(self):
         # TODO(healthver): Specifies the datasets.DatasetInfo object
 
@@ -60,6 +95,17 @@ class HealthVerEntailment(datasets.GeneratorBasedBuilder):
             "verdict": datasets.Value("string"),
             "evidence": datasets.features.Sequence(datasets.Value("int32")),
         }
+        if self.config.name == "rationale_spans":
+            features.update(
+                {
+                    "abstract_text": datasets.Value("string"),
+                    "sentence_starts": datasets.features.Sequence(datasets.Value("int32")),
+                    "sentence_ends": datasets.features.Sequence(datasets.Value("int32")),
+                    "sentence_token_counts": datasets.features.Sequence(datasets.Value("int32")),
+                    "evidence_starts": datasets.features.Sequence(datasets.Value("int32")),
+                    "evidence_ends": datasets.features.Sequence(datasets.Value("int32")),
+                }
+            )
 
         return datasets.DatasetInfo(
             # This is the description that will appear on the datasets page.
@@ -97,6 +143,10 @@ class HealthVerEntailment(datasets.GeneratorBasedBuilder):
             if path == "data/healthver/corpus.jsonl":
                 corpus = self._read_tar_file(f)
                 corpus = {x["doc_id"]: x for x in corpus}
+                if self.config.name == "rationale_spans":
+                    # Computed once per document, shared by every claim citing it.
+                    for doc in corpus.values():
+                        doc.update(precompute_abstract(doc))
             elif path == "data/healthver/claims_train.jsonl":
                 claims_train = self._read_tar_file(f)
             elif path == "data/healthver/claims_dev.jsonl":
@@ -165,6 +215,18 @@ class HealthVerEntailment(datasets.GeneratorBasedBuilder):
                     "verdict": verdict,
                     "evidence": evidence_sents,
                 }
+                if self.config.name == "rationale_spans":
+                    evidence_idx = np.array(evidence_sents, dtype=np.int64)
+                    instance.update(
+                        {
+                            "abstract_text": cited_doc["abstract_text"],
+                            "sentence_starts": cited_doc["sentence_starts"],
+                            "sentence_ends": cited_doc["sentence_ends"],
+                            "sentence_token_counts": cited_doc["sentence_token_counts"],
+                            "evidence_starts": cited_doc["sentence_starts"][evidence_idx],
+                            "evidence_ends": cited_doc["sentence_ends"][evidence_idx],
+                        }
+                    )
 
                 id_ += 1
                 yield id_, instance
\ No newline at end of file
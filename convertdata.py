@@ -1,9 +1,12 @@
 import json
 import os
 import random
+import re
+import unicodedata
 import pandas as pd
+import pyarrow as pa
 from typing import List, Dict, Any
-from collections import Counter
+from collections import Counter, defaultdict
 from newspaper import Article
 import requests
 from tqdm import tqdm  # For progress bar
@@ -97,6 +100,110 @@ def load_csv_files(healthver_dir: str) -> Dict[str, str]:
     print(f"Total unique claim-question mappings: {len(claim_to_question)}")
     return claim_to_question
 
+def normalize_claim(text: str) -> str:
+    """Canonicalize a claim: Unicode NFKC, lowercase, punctuation removed, whitespace collapsed."""
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return ' '.join(text.split())
+
+def claim_ngrams(normalized: str, n: int = 3) -> set:
+    """Character n-grams of a normalized claim (padded so short claims still get n-grams)."""
+    padded = f" {normalized} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+def build_claim_index(claim_to_question: Dict[str, str], n: int = 3) -> Dict[str, Any]:
+    """
+    Build a normalization + character n-gram index over the CSV claims.
+    
+    Args:
+        claim_to_question: Mapping from raw CSV claim to question (from load_csv_files)
+        n: Character n-gram size
+    
+    Returns:
+        Index dict with the normalized-key lookup, per-key n-grams and an
+        inverted index from n-gram to key ids
+    """
+    normalized_to_question = {}
+    for claim, question in claim_to_question.items():
+        normalized_to_question.setdefault(normalize_claim(claim), question)
+    
+    keys = list(normalized_to_question)
+    key_ngrams = [claim_ngrams(key, n) for key in keys]
+    postings = defaultdict(list)
+    for key_id, grams in enumerate(key_ngrams):
+        for gram in grams:
+            postings[gram].append(key_id)
+    
+    print(f"Built claim index: {len(keys)} normalized claims, {len(postings)} distinct {n}-grams")
+    return {
+        "n": n,
+        "normalized_to_question": normalized_to_question,
+        "keys": keys,
+        "key_ngrams": key_ngrams,
+        "postings": dict(postings),
+    }
+
+def resolve_claim_questions(claim_texts: List[str], claim_index: Dict[str, Any], threshold: float = 0.8,
+                            max_posting: int = 200, max_candidates: int = 10) -> Dict[str, str]:
+    """
+    Resolve CSV questions for all claims in one batched pass.
+    
+    Each claim is matched exactly on its normalized key first; otherwise the
+    n-gram index proposes candidates, which are accepted if their Jaccard
+    similarity is at least threshold. N-grams whose posting list is longer
+    than max_posting are skipped and only the max_candidates keys sharing the
+    most n-grams are scored, so the cost per claim is bounded.
+    
+    Returns:
+        Mapping from raw claim text to question for every claim that matched
+    """
+    normalized_to_question = claim_index["normalized_to_question"]
+    keys = claim_index["keys"]
+    key_ngrams = claim_index["key_ngrams"]
+    postings = claim_index["postings"]
+    
+    resolved = {}
+    match_counts = {"exact": 0, "fuzzy": 0, "unmatched": 0}
+    unique_claims = set(claim_texts)
+    for claim_text in unique_claims:
+        normalized = normalize_claim(claim_text)
+        if normalized in normalized_to_question:
+            resolved[claim_text] = normalized_to_question[normalized]
+            match_counts["exact"] += 1
+            continue
+        
+        grams = claim_ngrams(normalized, claim_index["n"])
+        shared = Counter()
+        for gram in grams:
+            posting = postings.get(gram, [])
+            if len(posting) <= max_posting:
+                shared.update(posting)
+        
+        best_id, best_score = None, 0.0
+        for key_id, _ in shared.most_common(max_candidates):
+            candidate = key_ngrams[key_id]
+            score = len(grams & candidate) / len(grams | candidate)
+            if score > best_score:
+                best_id, best_score = key_id, score
+        
+        if best_id is not None and best_score >= threshold:
+            resolved[claim_text] = normalized_to_question[keys[best_id]]
+            match_counts["fuzzy"] += 1
+        else:
+            match_counts["unmatched"] += 1
+    
+    total = len(unique_claims)
+    matched = match_counts["exact"] + match_counts["fuzzy"]
+    print(f"\n=== Claim-Question Matching ===")
+    print(f"Unique claims: {total}")
+    print(f"Exact (normalized) matches: {match_counts['exact']}")
+    print(f"Fuzzy (n-gram) matches: {match_counts['fuzzy']}")
+    print(f"Unmatched: {match_counts['unmatched']}")
+    if total > 0:
+        print(f"Match rate: {matched/total*100:.1f}%")
+    
+    return resolved
+
 def determine_majority_label(claim: Dict[str, Any], corpus_dict: Dict[str, Dict]) -> str:
     """
     Determine the correct answer using majority label rule based on evidence field.
@@ -318,13 +425,18 @@ def create_search_results(claim: Dict[str, Any], corpus_data: List[Dict], api_ke
     
     return search_results
 
-def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str = None, cx: str = None):
-    """Convert HealthVer dataset to MCQA format."""
+def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str = None, cx: str = None, arrow_file: str = None):
+    """Convert HealthVer dataset to MCQA format.
+
+    If arrow_file is given, the dataset is also written as an Arrow IPC file
+    (see save_mcqa_arrow).
+    """
     
     print(f"Looking for HealthVer files in: {healthver_dir}")
     
     # Load CSV files first to get claim-question mappings
     claim_to_question = load_csv_files(healthver_dir)
+    claim_index = build_claim_index(claim_to_question)
     
     # Load all claims files
     all_claims = []
@@ -385,6 +497,11 @@ def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str
         else:
             print(f"doc_id {doc_id}: Not found in corpus")
     
+    # Resolve CSV questions for all claims up front
+    resolved_questions = resolve_claim_questions(
+        [claim.get('claim', 'No claim text') for claim in all_claims], claim_index
+    )
+    
     # Process claims and filter valid ones
     valid_samples = []
     skipped_counts = {
@@ -421,7 +538,7 @@ def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str
             continue
         
         # Get question from CSV mapping or generate default
-        question_text = claim_to_question.get(claim_text.strip())
+        question_text = resolved_questions.get(claim_text)
         if question_text:
             # Use question from CSV and add options
             question = f"{question_text}\nA. Supported\nB. Refuted\nC. Not Enough Information"
@@ -492,11 +609,17 @@ def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(mcqa_data, f, indent=3, ensure_ascii=False)
     
+    if arrow_file:
+        print(f"Saving Arrow IPC export to: {arrow_file}")
+        save_mcqa_arrow(mcqa_data, arrow_file)
+    
     print(f"\n=== Conversion Complete ===")
     print(f"✓ Created MCQA dataset with {total_samples} samples")
     print(f"✓ Calibration: {len(mcqa_data['calibration'])} samples")
     print(f"✓ Test: {len(mcqa_data['test'])} samples")
     print(f"✓ Output saved to: {output_file}")
+    if arrow_file:
+        print(f"✓ Arrow export saved to: {arrow_file}")
     
     # Print question source statistics
     print(f"\n=== Question Source Statistics ===")
@@ -510,10 +633,72 @@ def convert_healthver_to_mcqa(healthver_dir: str, output_file: str, api_key: str
         label_name = {"A": "SUPPORT", "B": "CONTRADICT", "C": "NEI"}[answer]
         print(f"{answer} ({label_name}): {count} ({percentage:.1f}%)")
 
+MCQA_ARROW_SCHEMA = pa.schema([
+    ("split", pa.string()),
+    ("id", pa.string()),
+    ("question", pa.string()),
+    ("correct_answer", pa.string()),
+    ("options", pa.list_(pa.string())),
+    ("search_results", pa.list_(pa.struct([
+        ("page_name", pa.string()),
+        ("page_url", pa.string()),
+        ("page_snippet", pa.string()),
+        ("page_result", pa.string()),
+        ("page_last_modified", pa.string()),
+    ]))),
+])
+
+# Top-level MCQA fields stored in the Arrow schema metadata
+MCQA_METADATA_KEYS = ["name", "description", "version", "total_samples", "calibration_samples", "test_samples"]
+
+def save_mcqa_arrow(mcqa_data: Dict[str, Any], arrow_file: str):
+    """Save MCQA data as an uncompressed Arrow IPC file, one row per sample.
+
+    Sample fields are stored as columns and search_results as a list<struct>
+    column, so the file can be memory-mapped and read column by column.
+    """
+    rows = []
+    for split in ("calibration", "test"):
+        for sample in mcqa_data[split]:
+            rows.append({"split": split, **sample})
+    
+    metadata = {key: json.dumps(mcqa_data[key], ensure_ascii=False) for key in MCQA_METADATA_KEYS}
+    schema = MCQA_ARROW_SCHEMA.with_metadata(metadata)
+    table = pa.Table.from_pylist(rows, schema=schema)
+    
+    with pa.OSFile(arrow_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+
+def load_mcqa_arrow(arrow_file: str, columns: List[str] = None) -> Dict[str, Any]:
+    """Load an Arrow IPC file written by save_mcqa_arrow.
+
+    The file is memory-mapped, so only the requested columns are materialized;
+    e.g. columns=["id", "question", "correct_answer"] never decodes the
+    search_results blobs. Returns the same dict shape as healthver_mcqa.json,
+    with samples restricted to the requested columns.
+    """
+    with pa.memory_map(arrow_file, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+        metadata = {key.decode('utf-8'): json.loads(value) for key, value in (table.schema.metadata or {}).items()}
+        
+        if columns is not None:
+            table = table.select(["split"] + [c for c in columns if c != "split"])
+        
+        mcqa_data = {key: metadata.get(key) for key in MCQA_METADATA_KEYS}
+        mcqa_data["calibration"] = []
+        mcqa_data["test"] = []
+        for row in table.to_pylist():
+            split = row.pop("split")
+            mcqa_data[split].append(row)
+    
+    return mcqa_data
+
 def main():
     # Configuration
     healthver_directory = "./healthver"
     output_file = "healthver_mcqa.json"
+    arrow_file = "healthver_mcqa.arrow"
     
     # Lấy API key và CX từ tệp .env
     google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -542,7 +727,7 @@ def main():
             print(f" {file} ({size:,} bytes)")
     
     # Convert dataset
-    convert_healthver_to_mcqa(healthver_directory, output_file, google_api_key, google_cx)
+    convert_healthver_to_mcqa(healthver_directory, output_file, google_api_key, google_cx, arrow_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file